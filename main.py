@@ -1,9 +1,15 @@
 import streamlit as st
 import pandas as pd
+import hashlib
+import numpy as np
+import psycopg2
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from src.config import Config
 from src.database import Database
 from src.tmdb_api import TMDBApi
-from src.recommender import MovieRecommender
-from src.utils import generate_user_id, format_movie_card
+from src.recommender import MovieRecommender, hash_ratings
+from src.nlp_recommender import NLPRecommender
+from src.utils import generate_user_id, format_movie_card, lookup_genre_names
 import os
 
 # Configure page settings
@@ -68,40 +74,238 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Initialize global services
-db = Database()
-tmdb = TMDBApi()
+@st.cache_resource
+def get_database():
+    """Create the database handler once and share it across reruns"""
+    return Database()
+
+@st.cache_resource
+def get_tmdb_api():
+    """Create the TMDB client once and share it across reruns"""
+    return TMDBApi()
+
+db = get_database()
+tmdb = get_tmdb_api()
+
+# Cached TMDB wrappers (arguments must be hashable, so lists become tuples).
+# TMDBApi turns request errors into empty fallback responses; the cached
+# functions raise _FailedResponse for those instead, because st.cache_data
+# doesn't store exceptions, so a failed call is retried on the next rerun
+class _FailedResponse(Exception):
+    """A TMDB request failed; carries the fallback response to return uncached"""
+    def __init__(self, fallback):
+        super().__init__("TMDB request failed")
+        self.fallback = fallback
+
+def _uncached_on_failure(cached_func):
+    """Wrap a cached TMDB function so failures return their fallback without being cached"""
+    def wrapper(*args):
+        try:
+            return cached_func(*args)
+        except _FailedResponse as e:
+            return e.fallback
+    wrapper.__doc__ = cached_func.__doc__
+    return wrapper
+
+def _checked_listing(response):
+    """Raise _FailedResponse for a fallback listing (real responses always carry 'page')"""
+    if 'page' not in response:
+        raise _FailedResponse(response)
+    return response
+
+@_uncached_on_failure
+@st.cache_data(ttl=Config.MOVIE_CACHE_TTL, show_spinner=False)
+def get_movie_details_cached(movie_id):
+    """Get movie details, reusing responses across reruns and sessions"""
+    details = tmdb.get_movie_details(movie_id)
+    if not details:
+        raise _FailedResponse(details)
+    return details
+
+@_uncached_on_failure
+@st.cache_data(ttl=Config.POPULAR_MOVIES_TTL, show_spinner=False)
+def get_popular_cached(genres_tuple, year_tuple, page):
+    """Get a page of popular movies, reusing responses across reruns"""
+    return _checked_listing(
+        tmdb.get_popular_movies(list(genres_tuple) if genres_tuple else None, year_tuple, page=page)
+    )
+
+@_uncached_on_failure
+@st.cache_data(ttl=Config.POPULAR_MOVIES_TTL, show_spinner=False)
+def search_cached(query, year_tuple):
+    """Search movies, reusing responses across reruns"""
+    return _checked_listing(tmdb.search_movies(query, year_tuple))
+
+@_uncached_on_failure
+@st.cache_data(ttl=Config.MOVIE_CACHE_TTL, show_spinner=False)
+def fetch_genres():
+    """Get the genre id -> name mapping, fetched once for all sessions"""
+    genres = tmdb.get_genres()
+    genres_dict = {
+        genre['id']: genre['name'] 
+        for genre in genres.get('genres', [])
+    }
+    # TMDB always has genres, so an empty map means the request failed
+    if not genres_dict:
+        raise _FailedResponse(genres_dict)
+    return genres_dict
+
+@_uncached_on_failure
+@st.cache_data(ttl=Config.MOVIE_CACHE_TTL, show_spinner=False)
+def _sorted_genre_items():
+    """Get genres sorted by name and the index splitting them into two columns"""
+    sorted_genres = sorted(fetch_genres().items(), key=lambda x: x[1])
+    if not sorted_genres:
+        raise _FailedResponse(([], 0))
+    return sorted_genres, len(sorted_genres) // 2
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def get_nlp_recommender(corpus_hash, _movie_data):
+    """Get a fitted NLPRecommender for a movie corpus, shared across sessions
+    
+    Keyed on corpus_hash only (the underscore keeps Streamlit from hashing
+    _movie_data); a fitted model is also persisted to disk for reuse after
+    restarts, and files for older corpora are removed.
+    """
+    path = Config.CACHE_DIR / f"nlp_{corpus_hash}.joblib"
+    for stale in Config.CACHE_DIR.glob("nlp_*.joblib"):
+        if stale != path:
+            stale.unlink(missing_ok=True)
+    nlp_recommender = NLPRecommender.load(path)
+    if nlp_recommender is None:
+        nlp_recommender = NLPRecommender()
+        nlp_recommender.fit(_movie_data)
+        nlp_recommender.save(path)
+    return nlp_recommender
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def get_movie_recommender(ratings_hash, corpus_hash, _all_ratings, _nlp_recommender):
+    """Get a MovieRecommender for a ratings snapshot, shared across sessions
+    
+    Keyed on the ratings and corpus hashes only. The similarity matrices are
+    also persisted to disk, so a restart maps them back in instead of
+    recomputing; files for older ratings snapshots are removed.
+    """
+    variant = "lsh" if Config.RECOMMENDER_USE_LSH else "exact"
+    path = Config.CACHE_DIR / f"similarity_{ratings_hash}_{variant}.joblib"
+    for stale in Config.CACHE_DIR.glob("similarity_*.joblib"):
+        if stale != path:
+            stale.unlink(missing_ok=True)
+    
+    return MovieRecommender(
+        _all_ratings,
+        nlp_recommender=_nlp_recommender,
+        use_lsh=Config.RECOMMENDER_USE_LSH,
+        similarity_path=path
+    )
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def get_recommendations_cached(user_id, n_recommendations, ratings_hash, corpus_hash, _recommender):
+    """Get a user's recommendations, reused until the ratings or the corpus change
+    
+    _recommender must be the one built for ratings_hash and corpus_hash
+    (see get_movie_recommender); it is excluded from the cache key.
+    """
+    return _recommender.get_recommendations(user_id, n_recommendations=n_recommendations)
+
+def _corpus_hash(movie_data):
+    """Hash the set of movie IDs in a corpus"""
+    movie_ids = sorted(str(movie['id']) for movie in movie_data if movie)
+    return hashlib.sha1(",".join(movie_ids).encode()).hexdigest()
 
 # Helper Functions
 def get_genres():
-    """Get movie genres and store in session state"""
+    """Get movie genres and store in session state (only once they loaded)"""
     if 'genres_dict' not in st.session_state:
-        genres = tmdb.get_genres()
-        st.session_state['genres_dict'] = {
-            genre['id']: genre['name'] 
-            for genre in genres.get('genres', [])
-        }
+        genres_dict = fetch_genres()
+        if not genres_dict:
+            return genres_dict
+        # TMDB genre IDs are small integers, so an object array indexed by ID
+        # works as a lookup table (see lookup_genre_names)
+        genres_arr = np.full(max(genres_dict, default=-1) + 1, None, dtype=object)
+        genres_arr[list(genres_dict)] = list(genres_dict.values())
+        st.session_state['genres_dict'] = genres_dict
+        st.session_state['genres_arr'] = genres_arr
     return st.session_state['genres_dict']
 
+def iter_movie_details(movie_ids, known_details=None):
+    """Yield (movie_id, details) pairs as soon as each movie's details are available.
+    
+    Movies already in known_details (details fetched earlier in this run) are
+    yielded first, then database cache hits; the remaining misses are fetched
+    from TMDB concurrently and yielded in completion order, then written back
+    to the cache.
+    """
+    if not movie_ids:
+        return
+
+    known_details = known_details or {}
+    unique_ids = list(dict.fromkeys(movie_ids))
+    yield from ((movie_id, known_details[movie_id]) for movie_id in unique_ids if movie_id in known_details)
+
+    remaining = [movie_id for movie_id in unique_ids if movie_id not in known_details]
+    if not remaining:
+        return
+
+    cached = db.get_movies_bulk(remaining)
+    yield from cached.items()
+
+    misses = [movie_id for movie_id in remaining if movie_id not in cached]
+    if not misses:
+        return
+
+    fetched = []
+    executor = ThreadPoolExecutor(max_workers=Config.TMDB_MAX_WORKERS)
+    try:
+        futures = {executor.submit(get_movie_details_cached, movie_id): movie_id for movie_id in misses}
+        for future in as_completed(futures):
+            movie = future.result()
+            if movie:
+                fetched.append((futures[future], movie))
+            yield futures[future], movie
+    finally:
+        # Drop queued requests if the consumer stopped early (e.g. the grid is full)
+        executor.shutdown(wait=True, cancel_futures=True)
+        db.upsert_movies(fetched)
+
 def get_movie_details_batch(movie_ids):
-    """Get details for multiple movies efficiently"""
-    return [tmdb.get_movie_details(movie_id) for movie_id in movie_ids]
+    """Get details for multiple movies, calling TMDB only for database cache misses
+    
+    Unlike iter_movie_details, callers need every result before continuing,
+    so the misses are fetched together with asyncio over one HTTP/2 client.
+    """
+    unique_ids = list(dict.fromkeys(movie_ids))
+    if not unique_ids:
+        return []
+
+    details = db.get_movies_bulk(unique_ids)
+    misses = [movie_id for movie_id in unique_ids if movie_id not in details]
+    if misses:
+        fetched = list(zip(misses, tmdb.get_movie_details_bulk(misses)))
+        db.upsert_movies([(movie_id, movie) for movie_id, movie in fetched if movie])
+        details.update(fetched)
+    return [details[movie_id] for movie_id in movie_ids]
 
 def get_filtered_popular_movies(selected_genres, year_range=None, exclude_movies=None):
     """Get and filter popular movies based on criteria with pagination"""
     filtered_movies = []
+    genres_tuple = tuple(selected_genres) if selected_genres else ()
+    year_tuple = tuple(year_range) if year_range else None
+    selected_set = _as_frozenset(selected_genres)
+    exclude_set = _as_frozenset(exclude_movies)
     page = 1
-    max_pages = 50  # Limit API calls to avoid rate limiting
+    max_pages = 5  # Filters are applied by TMDB, so pages are already dense
     
     while len(filtered_movies) < 8 and page <= max_pages:
         # Get movies from current page
-        popular_movies = tmdb.get_popular_movies(selected_genres, year_range, page=page)
+        popular_movies = get_popular_cached(genres_tuple, year_tuple, page)
         if 'results' not in popular_movies:
             break
         
         # Filter movies from current page
         page_movies = [
             movie for movie in popular_movies['results']
-            if _movie_matches_criteria(movie, selected_genres, year_range, exclude_movies)
+            if _movie_matches_criteria(movie, selected_set, year_range, exclude_set)
         ]
         
         filtered_movies.extend(page_movies)
@@ -109,19 +313,29 @@ def get_filtered_popular_movies(selected_genres, year_range=None, exclude_movies
     
     return filtered_movies[:8]  # Return up to 8 movies
 
-def _movie_matches_criteria(movie, selected_genres, year_range, exclude_movies):
-    """Check if movie matches all filtering criteria"""
+def _as_frozenset(values):
+    """Convert an optional collection into a set for O(1) membership tests"""
+    if isinstance(values, (set, frozenset)):
+        return values
+    return frozenset(values or ())
+
+def _movie_matches_criteria(movie, selected_set, year_range, exclude_set):
+    """Check if movie matches all filtering criteria
+    
+    selected_set and exclude_set are sets (see _as_frozenset) so each check
+    is a hash lookup rather than a list scan.
+    """
     # Skip excluded movies
-    if exclude_movies and movie['id'] in exclude_movies:
+    if exclude_set and movie['id'] in exclude_set:
         return False
         
     # Check genre filter
-    if selected_genres and not any(g in selected_genres for g in movie.get('genre_ids', [])):
+    if selected_set and selected_set.isdisjoint(movie.get('genre_ids', ())):
         return False
         
     # Check year filter
     if year_range:
-        release_year = int(movie.get('release_date', '0000')[:4]) if movie.get('release_date') else 0
+        release_year = int(movie['release_date'][:4]) if movie.get('release_date') else 0
         if not (year_range[0] <= release_year <= year_range[1]):
             return False
             
@@ -141,15 +355,76 @@ def display_movie_grid(movies, is_rated=False, ratings=None, section="popular"):
     # Get all user ratings if not provided
     if ratings is None:
         ratings = db.get_all_ratings(user_id)
+    ratings_by_id = {r['movie_id']: r['rating'] for r in ratings} if ratings else {}
 
     # Display movies in a 4-column grid
     for i in range(0, len(movies), 4):
         cols = st.columns(4)
         for j, col in enumerate(cols):
             if i + j < len(movies):
-                _display_movie_card(col, movies[i + j], is_rated, ratings, section, i, j)
+                _display_movie_card(col, movies[i + j], is_rated, ratings_by_id, section, i, j)
 
-def _display_movie_card(col, movie, is_rated, ratings, section, i, j):
+def display_movie_grid_progressive(movie_ids, selected_genres, year_range, limit=8,
+                                   is_rated=False, ratings=None, section="popular",
+                                   known_details=None):
+    """Display movies in the grid as their details arrive, keeping the given order.
+    
+    known_details optionally maps movie_id to details already fetched in this
+    run, which are used instead of hitting the cache or TMDB again.
+    
+    Returns:
+        Number of movies displayed
+    """
+    if not movie_ids:
+        return 0
+
+    user_id = st.session_state.get('user_id')
+    if not user_id:
+        st.error("Please log in first")
+        return 0
+
+    if ratings is None:
+        ratings = db.get_all_ratings(user_id)
+    ratings_by_id = {r['movie_id']: r['rating'] for r in ratings} if ratings else {}
+
+    # Lay out the grid with loading placeholders before any details are fetched
+    placeholders = []
+    n_slots = min(limit, len(movie_ids))
+    for i in range(0, n_slots, 4):
+        cols = st.columns(4)
+        for j, col in enumerate(cols):
+            if i + j < n_slots:
+                with col:
+                    placeholder = st.empty()
+                    placeholder.caption("Loading...")
+                    placeholders.append(placeholder)
+
+    selected_set = _as_frozenset(selected_genres)
+
+    # Fill slots in ranking order: a movie is shown once it and every movie
+    # ranked above it have resolved, so the grid never reorders itself
+    resolved = {}
+    next_idx = 0
+    shown = 0
+    for movie_id, movie in iter_movie_details(movie_ids, known_details):
+        resolved[movie_id] = movie
+        while shown < n_slots and next_idx < len(movie_ids) and movie_ids[next_idx] in resolved:
+            candidate = resolved[movie_ids[next_idx]]
+            next_idx += 1
+            if candidate and _movie_matches_criteria(candidate, selected_set, year_range, None):
+                i, j = shown - shown % 4, shown % 4
+                _display_movie_card(placeholders[shown].container(), candidate, is_rated, ratings_by_id, section, i, j)
+                shown += 1
+        if shown == n_slots:
+            break
+
+    # Clear any slots left over after filtering
+    for placeholder in placeholders[shown:]:
+        placeholder.empty()
+
+    return shown
+
+def _display_movie_card(col, movie, is_rated, ratings_by_id, section, i, j):
     """Display individual movie card with rating functionality"""
     with col:
         # Display movie image and basic info
@@ -170,24 +445,33 @@ def _display_movie_card(col, movie, is_rated, ratings, section, i, j):
         st.text(overview[:200] + '...' if len(overview) > 200 else overview)
         
         # Handle movie rating
-        _handle_movie_rating(movie, is_rated, ratings, section, i, j)
+        _handle_movie_rating(movie, is_rated, ratings_by_id, section, i, j)
 
 def _display_genres(movie):
-    """Display movie genres"""
-    genre_names = []
-    if 'genres' in movie:
-        genre_names = [g['name'] for g in movie['genres']]
-    elif 'genre_ids' in movie and 'genres_dict' in st.session_state:
-        genres_dict = st.session_state['genres_dict']
-        genre_names = [genres_dict[g_id] for g_id in movie['genre_ids'] if g_id in genres_dict]
-    
-    if genre_names:
-        st.caption(", ".join(genre_names))
-
-def _handle_movie_rating(movie, is_rated, ratings, section, i, j):
+    """Display movie genres, building each movie's genre label once per session"""
+    if 'genre_labels' not in st.session_state:
+        st.session_state['genre_labels'] = {}
+    genre_labels = st.session_state['genre_labels']
+    
+    genre_label = genre_labels.get(movie['id'])
+    if genre_label is None:
+        genre_names = []
+        if 'genres' in movie:
+            genre_names = [g['name'] for g in movie['genres']]
+        elif 'genre_ids' in movie:
+            genre_names = lookup_genre_names(movie['genre_ids'])
+        genre_label = ", ".join(genre_names)
+        # Don't cache an empty label: genres may simply not have loaded yet
+        if genre_label:
+            genre_labels[movie['id']] = genre_label
+    
+    if genre_label:
+        st.caption(genre_label)
+
+def _handle_movie_rating(movie, is_rated, ratings_by_id, section, i, j):
     """Handle movie rating interface and logic"""
-    if is_rated and ratings:
-        rating = next((r['rating'] for r in ratings if r['movie_id'] == movie['id']), None)
+    if is_rated and ratings_by_id:
+        rating = ratings_by_id.get(movie['id'])
         if rating:
             st.text(f"Your Rating: {rating}/5")
     else:
@@ -198,12 +482,25 @@ def _handle_movie_rating(movie, is_rated, ratings, section, i, j):
         rating_cols = st.columns(5)
         for rating in range(1, 6):
             with rating_cols[rating-1]:
-                if st.button(f"{rating}", key=f"rate_{movie['id']}_{rating}_{section}_{i}_{j}"):
-                    _submit_rating(movie['id'], rating, section)
+                st.button(
+                    f"{rating}",
+                    key=f"rate_{movie['id']}_{rating}_{section}_{i}_{j}",
+                    on_click=_submit_rating,
+                    args=(movie['id'], rating, section)
+                )
 
 def _submit_rating(movie_id, rating, section):
-    """Submit user rating and update state"""
-    db.add_rating(st.session_state.user_id, movie_id, rating)
+    """Save user rating and update state
+    
+    Runs as a button callback, i.e. before the script reruns, so the rerun
+    triggered by the click already sees the new rating. A failed write only
+    reports an error; the movie stays unrated so it can be rated again.
+    """
+    try:
+        db.add_rating(st.session_state.user_id, movie_id, rating)
+    except psycopg2.Error:
+        st.error("Could not save your rating. Please try again.")
+        return
     
     # Update rated movies set
     if section == "popular":
@@ -212,7 +509,6 @@ def _submit_rating(movie_id, rating, section):
         st.session_state.rated_recommendation_movies.add(movie_id)
     
     st.success("Rating submitted!")
-    st.experimental_rerun()
 
 def main():
     """Main application function"""
@@ -270,8 +566,7 @@ def _create_sidebar_filters():
     selected_genres = []
     col1, col2 = st.columns(2)
     
-    sorted_genres = sorted(get_genres().items(), key=lambda x: x[1])
-    half = len(sorted_genres) // 2
+    sorted_genres, half = _sorted_genre_items()
     
     with col1:
         for genre_id, genre_name in sorted_genres[:half]:
@@ -287,25 +582,36 @@ def _create_sidebar_filters():
 
 def _handle_search(selected_genres, year_range):
     """Handle movie search functionality"""
-    search_query = st.text_input("Enter movie name", key="main_search")
+    # A form only reruns the script on submit, not on every edit of the query
+    with st.form("search_form"):
+        query = st.text_input("Enter movie name", key="main_search")
+        submitted = st.form_submit_button("Search")
+    
+    if submitted:
+        st.session_state.last_query = query
+        st.session_state.show_search_results = True
     
+    search_query = st.session_state.get('last_query')
     if search_query:
-        if st.button("Show/Hide Results"):
-            st.session_state.show_search_results = not st.session_state.show_search_results
-            st.experimental_rerun()
+        st.button("Show/Hide Results", on_click=_toggle_search_results)
     
     if search_query and st.session_state.show_search_results:
         _display_search_results(search_query, selected_genres, year_range)
 
+def _toggle_search_results():
+    """Toggle search results visibility"""
+    st.session_state.show_search_results = not st.session_state.show_search_results
+
 def _display_search_results(search_query, selected_genres, year_range):
     """Display search results with filtering"""
     st.subheader("Search Results")
-    search_results = tmdb.search_movies(search_query, year_range)
+    search_results = search_cached(search_query, tuple(year_range) if year_range else None)
     
     if 'results' in search_results and search_results['results']:
+        selected_set = _as_frozenset(selected_genres)
         filtered_results = [
             movie for movie in search_results['results'][:8]
-            if _movie_matches_criteria(movie, selected_genres, year_range, None)
+            if _movie_matches_criteria(movie, selected_set, year_range, None)
         ]
         
         if filtered_results:
@@ -319,14 +625,17 @@ def _create_main_tabs(selected_genres, year_range):
     """Create and handle main content tabs"""
     tab1, tab2, tab3 = st.tabs(["Popular Movies", "Recommendations", "Rated Movies"])
     
+    # Movie details fetched by one tab, reused by later tabs in the same run
+    movie_details_map = {}
+    
     with tab1:
         _handle_popular_movies_tab(selected_genres, year_range)
     
     with tab2:
-        _handle_recommendations_tab(selected_genres, year_range)
+        _handle_recommendations_tab(selected_genres, year_range, movie_details_map)
     
     with tab3:
-        _handle_rated_movies_tab(selected_genres, year_range)
+        _handle_rated_movies_tab(selected_genres, year_range, movie_details_map)
 
 def _handle_popular_movies_tab(selected_genres, year_range):
     """Handle Popular Movies tab content"""
@@ -345,78 +654,83 @@ def _handle_popular_movies_tab(selected_genres, year_range):
     else:
         st.info("No movies found matching your filters. Try adjusting your criteria.")
 
-def _handle_recommendations_tab(selected_genres, year_range):
+def _handle_recommendations_tab(selected_genres, year_range, movie_details_map):
     """Handle Recommendations tab content"""
     st.header("Your Recommendations")
-    user_ratings = db.get_user_ratings(st.session_state.user_id)
+    all_ratings = db.get_ratings_arrays()
     
-    if not user_ratings:
+    if not (all_ratings['user_id'] == st.session_state.user_id).any():
         st.info("Start rating movies to get personalized recommendations!")
         return
         
-    _process_recommendations(user_ratings, selected_genres, year_range)
+    _process_recommendations(all_ratings, selected_genres, year_range, movie_details_map)
 
-def _process_recommendations(user_ratings, selected_genres, year_range):
-    """Process and display movie recommendations"""
-    all_ratings = db.get_all_ratings()
-    recommender = MovieRecommender(all_ratings)
+def _process_recommendations(all_ratings, selected_genres, year_range, movie_details_map):
+    """Process and display movie recommendations
     
-    rated_movie_ids = list(set([r['movie_id'] for r in all_ratings]))
+    all_ratings holds the column arrays returned by Database.get_ratings_arrays.
+    """
+    rated_movie_ids = np.unique(all_ratings['movie_id']).tolist()
     movie_details = get_movie_details_batch(rated_movie_ids)
+    movie_details_map.update((m['id'], m) for m in movie_details if m)
     
-    recommendations, message = recommender.get_recommendations(
-        st.session_state.user_id,
-        n_recommendations=12,
-        movie_data=movie_details
+    corpus_hash = _corpus_hash(movie_details)
+    nlp_recommender = get_nlp_recommender(corpus_hash, movie_details)
+    ratings_hash = hash_ratings(all_ratings)
+    recommender = get_movie_recommender(ratings_hash, corpus_hash, all_ratings, nlp_recommender)
+    
+    recommendations, message = get_recommendations_cached(
+        st.session_state.user_id, 12, ratings_hash, corpus_hash, recommender
     )
     
     if recommendations:
-        _display_filtered_recommendations(recommendations, selected_genres, year_range)
+        _display_filtered_recommendations(recommendations, selected_genres, year_range, movie_details_map)
     else:
         st.info(message)
 
-def _display_filtered_recommendations(recommendations, selected_genres, year_range):
+def _display_filtered_recommendations(recommendations, selected_genres, year_range, movie_details_map):
     """Display filtered movie recommendations"""
-    filtered_recommendations = []
-    for movie_id in recommendations:
-        if movie_id not in st.session_state.rated_recommendation_movies:
-            movie_details = tmdb.get_movie_details(movie_id)
-            if _movie_matches_criteria(movie_details, selected_genres, year_range, None):
-                filtered_recommendations.append(movie_details)
-    
-    if filtered_recommendations:
-        display_movie_grid(filtered_recommendations[:8], section="recommendations")
-    else:
+    candidate_ids = [
+        movie_id for movie_id in recommendations
+        if movie_id not in st.session_state.rated_recommendation_movies
+    ]
+    shown = display_movie_grid_progressive(
+        candidate_ids, selected_genres, year_range, section="recommendations",
+        known_details=movie_details_map
+    )
+    
+    if not shown:
         st.info("No recommendations found matching your genre and year preferences.")
 
-def _handle_rated_movies_tab(selected_genres, year_range):
+def _handle_rated_movies_tab(selected_genres, year_range, movie_details_map):
     """Handle Rated Movies tab content"""
     st.header("Your Highly Rated Movies")
-    user_ratings = db.get_user_ratings(st.session_state.user_id)
+    high_rated_movies = db.get_high_rated(st.session_state.user_id)
     
-    if not user_ratings:
-        st.info("Start rating movies to see your favorites here!")
+    if not high_rated_movies:
+        # Only distinguish "no ratings" from "no high ratings" when needed
+        if db.get_user_ratings(st.session_state.user_id):
+            st.info("You haven't rated any movies 4 stars or higher yet!")
+        else:
+            st.info("Start rating movies to see your favorites here!")
         return
         
-    _display_rated_movies(user_ratings, selected_genres, year_range)
+    _display_rated_movies(high_rated_movies, selected_genres, year_range, movie_details_map)
 
-def _display_rated_movies(user_ratings, selected_genres, year_range):
-    """Display user's rated movies with filtering"""
-    high_rated_movies = [rating for rating in user_ratings if rating['rating'] >= 4]
+def _display_rated_movies(high_rated_movies, selected_genres, year_range, movie_details_map):
+    """Display user's highly rated movies with filtering"""
+    shown = display_movie_grid_progressive(
+        [rating['movie_id'] for rating in high_rated_movies],
+        selected_genres,
+        year_range,
+        limit=len(high_rated_movies),
+        is_rated=True,
+        ratings=high_rated_movies,
+        section="rated",
+        known_details=movie_details_map
+    )
     
-    if not high_rated_movies:
-        st.info("You haven't rated any movies 4 stars or higher yet!")
-        return
-        
-    movie_details = []
-    for rating in high_rated_movies:
-        movie = tmdb.get_movie_details(rating['movie_id'])
-        if _movie_matches_criteria(movie, selected_genres, year_range, None):
-            movie_details.append(movie)
-    
-    if movie_details:
-        display_movie_grid(movie_details, is_rated=True, ratings=high_rated_movies, section="rated")
-    else:
+    if not shown:
         st.info("No highly rated movies match your genre and year preferences.")
 
 if __name__ == "__main__":
@@ -10,10 +10,20 @@ class Config:
     """Application configuration."""
     # Database
     DATABASE_URL = os.getenv('DATABASE_URL')
+    DB_POOL_MIN_CONN = 1
+    DB_POOL_MAX_CONN = 10
     
     # TMDB API
     TMDB_API_KEY = os.getenv('TMDB_API_KEY')
     TMDB_BASE_URL = "https://api.themoviedb.org/3"
+    TMDB_MAX_WORKERS = 10  # Concurrent detail requests
+    TMDB_CONNECT_RETRIES = 3  # Retries for failed connection attempts
+    TMDB_RATE_LIMIT = 40  # Requests allowed per rate period
+    TMDB_RATE_PERIOD = 10  # Rate period (in seconds)
+    
+    # Recommender
+    # Approximate (LSH) neighbour search instead of all-pairs similarity
+    RECOMMENDER_USE_LSH = os.getenv('RECOMMENDER_USE_LSH', '').lower() in ('1', 'true', 'yes')
     
     # Redis Cache
     REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379')
@@ -27,4 +37,5 @@ class Config:
     
     # Paths
     ROOT_DIR = Path(__file__).parent.parent
-    STATIC_DIR = ROOT_DIR / 'static' 
\ No newline at end of file
+    STATIC_DIR = ROOT_DIR / 'static'
+    CACHE_DIR = ROOT_DIR / 'cache' 
\ No newline at end of file
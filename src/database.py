@@ -1,9 +1,12 @@
-import os
+import atexit
 import logging
-from typing import List, Dict, Optional
+from contextlib import contextmanager
+from typing import List, Dict, Optional, Tuple
+import numpy as np
 import psycopg2
-from psycopg2.extras import RealDictCursor
-from dotenv import load_dotenv
+from psycopg2.pool import ThreadedConnectionPool
+from psycopg2.extras import RealDictCursor, Json, execute_values
+from .config import Config
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -13,63 +16,99 @@ class Database:
     """Database connection and operations handler."""
     
     def __init__(self):
-        """Initialize database connection using environment variables."""
-        load_dotenv()
-        self.database_url = os.getenv('DATABASE_URL')
+        """Initialize database connection using the configured DATABASE_URL."""
+        self.database_url = Config.DATABASE_URL
         if not self.database_url:
             raise ValueError("DATABASE_URL not found in environment variables")
         self.connect()
+        atexit.register(self._close_all)
 
     def connect(self):
-        """Establish database connection."""
+        """Create the database connection pool."""
         try:
-            self.conn = psycopg2.connect(self.database_url)
+            self.pool = ThreadedConnectionPool(
+                Config.DB_POOL_MIN_CONN,
+                Config.DB_POOL_MAX_CONN,
+                dsn=self.database_url
+            )
             self.create_tables()
-            logger.info("Database connection established successfully")
+            logger.info("Database connection pool established successfully")
         except (psycopg2.Error, ValueError) as e:
             logger.error(f"Database connection failed: {e}")
             raise
 
-    def ensure_connection(self):
-        """Ensure database connection is healthy and reconnect if necessary."""
-        try:
-            # Test if connection is alive and not in error state
-            with self.conn.cursor() as cur:
-                cur.execute("SELECT 1")
-        except (psycopg2.Error, AttributeError):
-            logger.info("Reconnecting to database...")
-            self.connect()
-
-    def execute_transaction(self, operation):
-        """Execute a database operation within a transaction."""
-        self.ensure_connection()
+    @contextmanager
+    def _conn(self):
+        """Borrow a connection from the pool, discarding it if it turns out to be broken."""
+        conn = self.pool.getconn()
+        broken = False
         try:
-            with self.conn:  # Automatically manages commit/rollback
-                with self.conn.cursor() as cur:
-                    return operation(cur)
-        except psycopg2.Error as e:
-            logger.error(f"Database operation failed: {e}")
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
             raise
+        finally:
+            self.pool.putconn(conn, close=broken or bool(conn.closed))
+
+    def execute_transaction(self, operation, **cursor_kwargs):
+        """Execute a database operation within a transaction.
+        
+        A connection that fails with a connection-level error is dropped from
+        the pool and the operation is retried once on a fresh connection.
+        
+        Args:
+            operation: Callable receiving the cursor
+            **cursor_kwargs: Extra arguments for connection.cursor()
+        """
+        for attempt in range(2):
+            try:
+                with self._conn() as conn:
+                    with conn:  # Automatically manages commit/rollback
+                        with conn.cursor(**cursor_kwargs) as cur:
+                            return operation(cur)
+            except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+                if attempt == 0:
+                    logger.info("Database connection lost, retrying with a new connection...")
+                    continue
+                logger.error(f"Database operation failed: {e}")
+                raise
+            except psycopg2.Error as e:
+                logger.error(f"Database operation failed: {e}")
+                raise
 
     def create_tables(self) -> None:
         """Create necessary database tables if they don't exist."""
+        def _operation(cursor):
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS user_ratings (
+                    id SERIAL PRIMARY KEY,
+                    user_id TEXT NOT NULL,
+                    movie_id INTEGER NOT NULL,
+                    rating INTEGER CHECK (rating >= 1 AND rating <= 5),
+                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE(user_id, movie_id)
+                )
+            """)
+            # Lookups by user_id are served by the UNIQUE(user_id, movie_id) index;
+            # this partial index serves the most-recent highly rated movies query
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS ix_user_ratings_user_high_rated
+                ON user_ratings (user_id, timestamp DESC)
+                WHERE rating >= 4
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS movie_details_cache (
+                    movie_id INTEGER PRIMARY KEY,
+                    payload JSONB NOT NULL,
+                    updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+
         try:
-            with self.conn.cursor() as cur:
-                cur.execute("""
-                    CREATE TABLE IF NOT EXISTS user_ratings (
-                        id SERIAL PRIMARY KEY,
-                        user_id TEXT NOT NULL,
-                        movie_id INTEGER NOT NULL,
-                        rating INTEGER CHECK (rating >= 1 AND rating <= 5),
-                        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        UNIQUE(user_id, movie_id)
-                    )
-                """)
-                self.conn.commit()
-                logger.info("Tables created/verified successfully")
+            self.execute_transaction(_operation)
+            logger.info("Tables created/verified successfully")
         except psycopg2.Error as e:
             logger.error(f"Error creating tables: {e}")
-            self.conn.rollback()
             raise
 
     def add_rating(self, user_id: str, movie_id: int, rating: int) -> None:
@@ -101,18 +140,47 @@ class Database:
         Returns:
             List of dictionaries containing movie_id and rating
         """
+        def _operation(cursor):
+            cursor.execute("""
+                SELECT movie_id, rating
+                FROM user_ratings
+                WHERE user_id = %s
+            """, (user_id,))
+            return cursor.fetchall()
+
         try:
-            with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute("""
-                    SELECT movie_id, rating
-                    FROM user_ratings
-                    WHERE user_id = %s
-                """, (user_id,))
-                return cur.fetchall()
+            return self.execute_transaction(_operation, cursor_factory=RealDictCursor)
         except psycopg2.Error as e:
             logger.error(f"Error getting user ratings: {e}")
             raise
 
+    def get_high_rated(self, user_id: str, min_rating: int = 4, limit: int = 100) -> List[Dict]:
+        """Get a user's most recent highly rated movies.
+        
+        Args:
+            user_id: Unique identifier for the user
+            min_rating: Minimum rating to include
+            limit: Maximum number of ratings to return
+            
+        Returns:
+            List of dictionaries containing movie_id and rating, newest first
+        """
+        def _operation(cursor):
+            cursor.execute("""
+                SELECT movie_id, rating
+                FROM user_ratings
+                WHERE user_id = %s AND rating >= %s
+                ORDER BY timestamp DESC
+                LIMIT %s
+            """, (user_id, min_rating, limit))
+            return cursor.fetchall()
+
+        try:
+            return self.execute_transaction(_operation, cursor_factory=RealDictCursor)
+        except psycopg2.Error as e:
+            logger.error(f"Error getting highly rated movies: {e}")
+            raise
+
     def get_all_ratings(self, user_id=None):
         """Get all ratings, optionally filtered by user_id.
         
@@ -150,7 +218,107 @@ class Database:
         except psycopg2.Error:
             return []
 
-    def __del__(self):
-        """Close database connection when object is destroyed."""
-        if hasattr(self, 'conn'):
-            self.conn.close()
\ No newline at end of file
+    def get_ratings_arrays(self, chunk_size: int = 10000) -> Dict[str, np.ndarray]:
+        """Get all ratings as column arrays, streamed with a server-side cursor.
+        
+        Rows are fetched chunk_size at a time and packed straight into NumPy
+        arrays, avoiding a list of per-row dictionaries. They are ordered by
+        (user_id, movie_id) so the same ratings always hash the same.
+        
+        Args:
+            chunk_size: Number of rows fetched from the server per round trip
+            
+        Returns:
+            Dictionary with 'user_id' (object), 'movie_id' (int32) and
+            'rating' (int8) arrays of equal length
+        """
+        def _operation(cursor):
+            cursor.execute("""
+                SELECT user_id, movie_id, rating
+                FROM user_ratings
+                ORDER BY user_id, movie_id
+            """)
+            user_ids, movie_ids, ratings = [], [], []
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                count = len(rows)
+                user_ids.append(np.fromiter((row[0] for row in rows), dtype=object, count=count))
+                movie_ids.append(np.fromiter((row[1] for row in rows), dtype=np.int32, count=count))
+                ratings.append(np.fromiter((row[2] for row in rows), dtype=np.int8, count=count))
+            return user_ids, movie_ids, ratings
+
+        try:
+            user_ids, movie_ids, ratings = self.execute_transaction(_operation, name='ratings_cur')
+        except psycopg2.Error:
+            user_ids, movie_ids, ratings = [], [], []
+
+        return {
+            'user_id': np.concatenate(user_ids) if user_ids else np.empty(0, dtype=object),
+            'movie_id': np.concatenate(movie_ids) if movie_ids else np.empty(0, dtype=np.int32),
+            'rating': np.concatenate(ratings) if ratings else np.empty(0, dtype=np.int8),
+        }
+
+    def get_movies_bulk(self, movie_ids: List[int]) -> Dict[int, Dict]:
+        """Get cached TMDB details for several movies in a single query.
+        
+        Args:
+            movie_ids: TMDB movie IDs to look up
+            
+        Returns:
+            Dictionary mapping movie_id to its cached details; stale or
+            missing movies are left out
+        """
+        if not movie_ids:
+            return {}
+
+        def _operation(cursor):
+            cursor.execute(
+                """
+                SELECT movie_id, payload
+                FROM movie_details_cache
+                WHERE movie_id = ANY(%s)
+                  AND updated > CURRENT_TIMESTAMP - %s * INTERVAL '1 second'
+                """,
+                ([int(movie_id) for movie_id in movie_ids], Config.MOVIE_CACHE_TTL)
+            )
+            return {row[0]: row[1] for row in cursor.fetchall()}
+
+        try:
+            return self.execute_transaction(_operation)
+        except psycopg2.Error:
+            return {}
+
+    def upsert_movies(self, rows: List[Tuple[int, Dict]]) -> None:
+        """Store TMDB details for several movies in a single batched insert.
+        
+        Args:
+            rows: List of (movie_id, details) tuples
+        """
+        if not rows:
+            return
+
+        def _operation(cursor):
+            execute_values(
+                cursor,
+                """
+                INSERT INTO movie_details_cache (movie_id, payload)
+                VALUES %s
+                ON CONFLICT (movie_id)
+                DO UPDATE SET payload = EXCLUDED.payload, updated = CURRENT_TIMESTAMP
+                """,
+                [(int(movie_id), Json(details)) for movie_id, details in rows]
+            )
+
+        try:
+            self.execute_transaction(_operation)
+            logger.info(f"Cached details for {len(rows)} movies")
+        except psycopg2.Error as e:
+            logger.error(f"Error caching movie details: {e}")
+
+    def _close_all(self):
+        """Close pooled connections at interpreter exit."""
+        if not self.pool.closed:
+            self.pool.closeall()
+            logger.info("Database connection pool closed")
\ No newline at end of file
@@ -1,6 +1,9 @@
+from functools import lru_cache
+import joblib
 import numpy as np
+import scipy.sparse as sp
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.preprocessing import normalize
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,8 +16,14 @@ class NLPRecommender:
             ngram_range=(1, 2)
         )
         self.movie_tfidf_matrix = None
+        self.similarity_matrix = None
         self.movie_ids = None
+        self.movie_ids_arr = None
+        self.id_to_idx = {}
         self.movie_descriptions = None
+        self.SIMILAR_MOVIES_KEPT = 50  # Most similar movies stored per movie (max n per query)
+        self.SIMILARITY_BLOCK_CELLS = 1 << 22  # Dense cells per block while building
+        self._top_similar = lru_cache(maxsize=1024)(self._compute_top_similar)
 
     def fit(self, movie_data):
         """
@@ -36,15 +45,90 @@ class NLPRecommender:
             
             self.movie_ids, self.movie_descriptions = zip(*valid_movies)
             
-            # Create TF-IDF matrix
-            self.movie_tfidf_matrix = self.tfidf.fit_transform(self.movie_descriptions)
+            # Create TF-IDF matrix with unit-length rows so cosine similarity is a plain dot product
+            self.movie_tfidf_matrix = normalize(
+                self.tfidf.fit_transform(self.movie_descriptions), norm='l2', copy=False
+            )
+            self.movie_ids_arr = np.array(self.movie_ids)
+            self.id_to_idx = {movie_id: idx for idx, movie_id in enumerate(self.movie_ids)}
+            
+            self._build_similarity()
             logger.info(f"Created TF-IDF matrix with shape: {self.movie_tfidf_matrix.shape}")
             
         except Exception as e:
             logger.error(f"Error in fitting NLP recommender: {str(e)}")
             self.movie_tfidf_matrix = None
+            self.similarity_matrix = None
             self.movie_ids = None
+            self.movie_ids_arr = None
+            self.id_to_idx = {}
             self.movie_descriptions = None
+            self._top_similar = lru_cache(maxsize=1024)(self._compute_top_similar)
+
+    def _build_similarity(self):
+        """Precompute each movie's most similar movies once so queries become row lookups
+        
+        Only the top SIMILAR_MOVIES_KEPT scores per row (plus the movie itself)
+        are kept, as float32 CSR; rows are computed in blocks of about
+        SIMILARITY_BLOCK_CELLS dense cells, so the full n x n matrix never exists.
+        """
+        tfidf = self.movie_tfidf_matrix.astype(np.float32)
+        tfidf_t = tfidf.T.tocsc()
+        n_movies = tfidf.shape[0]
+        k = min(self.SIMILAR_MOVIES_KEPT + 1, n_movies)
+        block_rows = max(1, self.SIMILARITY_BLOCK_CELLS // n_movies)
+        
+        rows, cols, scores = [], [], []
+        for start in range(0, n_movies, block_rows):
+            block = (tfidf[start:start + block_rows] @ tfidf_t).toarray()
+            top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+            rows.append(np.repeat(np.arange(start, start + len(block)), k))
+            cols.append(top.ravel())
+            scores.append(np.take_along_axis(block, top, axis=1).ravel())
+        
+        self.similarity_matrix = sp.csr_matrix(
+            (np.concatenate(scores), (np.concatenate(rows), np.concatenate(cols))),
+            shape=(n_movies, n_movies)
+        )
+        self.similarity_matrix.eliminate_zeros()
+        self._top_similar = lru_cache(maxsize=1024)(self._compute_top_similar)
+
+    def save(self, path):
+        """Persist the fitted vectorizer and TF-IDF matrix to disk"""
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            joblib.dump(self, path)
+            logger.info(f"Saved NLP recommender to {path}")
+        except Exception as e:
+            logger.error(f"Error saving NLP recommender: {str(e)}")
+
+    @classmethod
+    def load(cls, path):
+        """Load a recommender saved with save(), or return None if unavailable"""
+        if not path.exists():
+            return None
+        try:
+            recommender = joblib.load(path)
+            logger.info(f"Loaded NLP recommender from {path}")
+            return recommender
+        except Exception as e:
+            logger.error(f"Error loading NLP recommender: {str(e)}")
+            return None
+
+    def __getstate__(self):
+        """Drop derived state: the similarity matrix is large but cheap to
+        rebuild, and the lru_cache around a bound method cannot be pickled"""
+        state = self.__dict__.copy()
+        state['similarity_matrix'] = None
+        del state['_top_similar']
+        return state
+
+    def __setstate__(self, state):
+        """Restore pickled state and rebuild the derived similarity data"""
+        self.__dict__.update(state)
+        self._top_similar = lru_cache(maxsize=1024)(self._compute_top_similar)
+        if self.movie_tfidf_matrix is not None:
+            self._build_similarity()
 
     def get_similar_movies(self, movie_id, n_recommendations=5):
         """
@@ -58,29 +142,37 @@ class NLPRecommender:
             List of similar movie IDs
         """
         try:
-            if self.movie_tfidf_matrix is None:
+            if self.similarity_matrix is None:
                 logger.warning("TF-IDF matrix not initialized")
                 return []
             
             # Find movie index
-            if movie_id not in self.movie_ids:
+            movie_idx = self.id_to_idx.get(movie_id)
+            if movie_idx is None:
                 logger.warning(f"Movie ID {movie_id} not found in the matrix")
                 return []
             
-            movie_idx = self.movie_ids.index(movie_id)
-            
-            # Calculate similarity scores
-            movie_vector = self.movie_tfidf_matrix[movie_idx]
-            similarity_scores = cosine_similarity(movie_vector, self.movie_tfidf_matrix)
-            
-            # Get indices of similar movies (excluding the input movie)
-            similar_indices = similarity_scores.argsort()[0][::-1][1:n_recommendations+1]
-            
-            # Convert indices to movie IDs
-            similar_movies = [self.movie_ids[idx] for idx in similar_indices]
-            
-            return similar_movies
+            return list(self._top_similar(movie_idx, n_recommendations))
             
         except Exception as e:
             logger.error(f"Error in getting similar movies: {str(e)}")
             return []
+
+    def _compute_top_similar(self, movie_idx, n_recommendations):
+        """Select the most similar movie IDs from the precomputed similarity row"""
+        similarity_scores = self.similarity_matrix[movie_idx]
+        if not isinstance(similarity_scores, np.ndarray):
+            similarity_scores = similarity_scores.toarray()
+        similarity_scores = similarity_scores.ravel()
+        
+        # Select the top candidates without sorting the whole array
+        k = min(n_recommendations + 1, len(similarity_scores))
+        if k < len(similarity_scores):
+            top_indices = np.argpartition(-similarity_scores, k - 1)[:k]
+        else:
+            top_indices = np.arange(len(similarity_scores))
+        top_indices = top_indices[np.argsort(-similarity_scores[top_indices])]
+        
+        # Exclude the input movie and convert indices to movie IDs
+        similar_indices = top_indices[top_indices != movie_idx][:n_recommendations]
+        return tuple(self.movie_ids_arr[similar_indices].tolist())
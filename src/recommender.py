@@ -1,6 +1,11 @@
+import hashlib
+from itertools import chain
+import joblib
 import pandas as pd
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
+import scipy.sparse as sp
+from sklearn.neighbors import NearestNeighbors
+from sklearn.preprocessing import normalize
 import logging
 from .nlp_recommender import NLPRecommender
 
@@ -8,15 +13,182 @@ from .nlp_recommender import NLPRecommender
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# A user Gram matrix may go through dense BLAS on a dense copy when the input
+# and output together are at most DENSE_GRAM_LIMIT cells and the input is at
+# least DENSE_GRAM_MIN_DENSITY full; sparser inputs are faster as a sparse product
+DENSE_GRAM_LIMIT = 4_000_000
+DENSE_GRAM_MIN_DENSITY = 0.1
+
+# Above this many users, similar users come from brute-force cosine kNN queries
+# instead of a precomputed (O(users^2) memory) user similarity matrix
+MAX_PRECOMPUTED_USERS = 2000
+
+# Similarity strips are sized to the L2 cache, with a floor to bound per-block overhead
+L2_CACHE_BYTES = 1 << 20
+MIN_BLOCK_ROWS = 64
+
+# Random-projection LSH: signatures get enough bits for buckets of about
+# LSH_BUCKET_SIZE rows, so candidates per query stay roughly constant as data
+# grows; more tables raise the chance that true neighbours share a bucket
+LSH_BUCKET_SIZE = 32
+LSH_TABLES = 16
+
+def _top_k_similarity_blocked(normalized, k):
+    """Top-k cosine neighbours of every row (excluding itself) as CSR
+    
+    Rows of normalized must be L2-normalized. Similarities are computed one
+    strip of rows at a time and reduced to top-k immediately, so only a
+    block_size x n_rows strip is ever resident instead of the full n x n matrix.
+    """
+    n_rows = normalized.shape[0]
+    # Size strips so a dense float32 strip would roughly fit in L2 cache
+    block_size = max(MIN_BLOCK_ROWS, L2_CACHE_BYTES // (4 * n_rows))
+    normalized_t = normalized.T.tocsc()
+    
+    blocks = []
+    for start in range(0, n_rows, block_size):
+        strip = (normalized[start:start + block_size] @ normalized_t).tocsr()
+        blocks.append(_keep_top_k_per_row(strip, k, diagonal_offset=start))
+    return sp.vstack(blocks, format='csr')
+
+class _SimHashIndex:
+    """Random-projection (SimHash) LSH index over L2-normalized rows
+    
+    Each table hashes a row to the signs of its projections onto n_bits
+    random hyperplanes, packed into a uint64 code. Rows sharing a code in any
+    table are candidate neighbours, to be rescored with exact cosine.
+    """
+    def __init__(self, vectors, n_tables=LSH_TABLES, seed=0):
+        rng = np.random.default_rng(seed)
+        self.vectors = vectors
+        n_bits = int(np.clip(np.log2(max(vectors.shape[0], 1) / LSH_BUCKET_SIZE), 1, 64))
+        self.n_bits = n_bits
+        self.n_tables = n_tables
+        self.planes = rng.standard_normal((vectors.shape[1], n_tables * n_bits)).astype(np.float32)
+        self.shifts = np.arange(n_bits, dtype=np.uint64)
+        self.codes = self._hash(vectors)
+        
+        # Per table, map each code to the array of rows in that bucket
+        self.tables = []
+        for table_codes in self.codes.T:
+            order = np.argsort(table_codes, kind='stable')
+            codes, starts = np.unique(table_codes[order], return_index=True)
+            self.tables.append(dict(zip(codes.tolist(), np.split(order, starts[1:]))))
+    
+    def _hash(self, vectors):
+        """n_rows x n_tables array of packed signatures"""
+        bits = np.asarray(vectors @ self.planes) > 0
+        bits = bits.reshape(-1, self.n_tables, self.n_bits).astype(np.uint64)
+        return np.bitwise_or.reduce(bits << self.shifts, axis=2)
+    
+    def candidates(self, row):
+        """Indices of rows sharing a bucket with row in any table, excluding row itself"""
+        buckets = [table[code] for table, code in zip(self.tables, self.codes[row].tolist())]
+        candidates = np.unique(np.concatenate(buckets))
+        return candidates[candidates != row]
+    
+    def similarities(self, row, candidates):
+        """Exact cosine similarity between row and each candidate row"""
+        return np.asarray(self.vectors[candidates] @ self.vectors[row].T.toarray()).ravel()
+
+def _cosine_similarity(matrix):
+    """Cosine similarity between the rows of a sparse matrix, returned as CSR
+    
+    Rows must already be L2-normalized, so the similarity is the plain Gram
+    matrix and no normalization pass is repeated here. Small, fairly dense
+    matrices use BLAS on a dense copy; everything else a sparse product.
+    """
+    n_rows, n_cols = matrix.shape
+    small = n_rows * n_cols + n_rows * n_rows <= DENSE_GRAM_LIMIT
+    if small and matrix.nnz >= DENSE_GRAM_MIN_DENSITY * n_rows * n_cols:
+        dense = matrix.toarray()
+        return sp.csr_matrix(dense @ dense.T)
+    return (matrix @ matrix.T).tocsr()
+
+def hash_ratings(ratings_data):
+    """Content hash of a ratings table, used to key persisted similarity matrices
+    
+    The hash depends on row order, so callers pass rows in a fixed order
+    (Database.get_ratings_arrays sorts by user_id, movie_id).
+    """
+    row_hashes = pd.util.hash_pandas_object(pd.DataFrame(ratings_data), index=False)
+    return hashlib.blake2b(row_hashes.to_numpy().tobytes(), digest_size=16).hexdigest()
+
+def _top_k(scores, k):
+    """Indices of the k largest scores, highest first, without a full sort
+    
+    Equal scores keep their original order (like a stable sort), so results
+    don't depend on how argpartition happens to break ties.
+    """
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k < len(scores):
+        threshold = -np.partition(-scores, k - 1)[k - 1]
+        above = np.flatnonzero(scores > threshold)
+        ties = np.flatnonzero(scores == threshold)[:k - len(above)]
+        top = np.concatenate([above, ties])
+    else:
+        top = np.arange(len(scores))
+    return top[np.argsort(-scores[top], kind='stable')]
+
+def _keep_top_k_per_row(matrix, k, diagonal_offset=None):
+    """Sparsify a CSR matrix to at most the k largest entries of each row
+    
+    If diagonal_offset is given, the entry in column row + diagonal_offset
+    (the self-similarity when matrix is a row block) is dropped first.
+    """
+    indptr = np.zeros(matrix.shape[0] + 1, dtype=np.int64)
+    indices, data = [], []
+    for row in range(matrix.shape[0]):
+        start, end = matrix.indptr[row], matrix.indptr[row + 1]
+        row_indices, row_data = matrix.indices[start:end], matrix.data[start:end]
+        if diagonal_offset is not None:
+            not_self = row_indices != row + diagonal_offset
+            row_indices, row_data = row_indices[not_self], row_data[not_self]
+        keep = _top_k(row_data, k)
+        indices.append(row_indices[keep])
+        data.append(row_data[keep])
+        indptr[row + 1] = indptr[row] + len(keep)
+    
+    result = sp.csr_matrix(
+        (np.concatenate(data) if data else np.empty(0, dtype=matrix.dtype),
+         np.concatenate(indices) if indices else np.empty(0, dtype=np.int32),
+         indptr),
+        shape=matrix.shape
+    )
+    result.sort_indices()
+    return result
+
 class MovieRecommender:
-    def __init__(self, ratings_data):
+    def __init__(self, ratings_data, nlp_recommender=None, use_lsh=False, similarity_path=None):
         self.ratings_df = pd.DataFrame(ratings_data)
         self.user_movie_matrix = None
+        self.user_index = None
+        self.movie_index = None
+        self.user_pos = {}
+        self.movie_pos = {}
+        self.user_means = None
+        self.user_rated = {}
+        self.user_ratings_arr = {}
         self.item_similarity_matrix = None
         self.user_similarity_matrix = None
-        self.nlp_recommender = NLPRecommender()
+        self.normalized_matrix = None
+        self.normalized_items = None
+        # With use_lsh, similar users come from SimHash candidates rescored
+        # exactly instead of all-pairs similarity, trading a little recall for scale
+        self.use_lsh = use_lsh
+        self.user_lsh_index = None
+        self.user_neighbors = None
+        # Joblib file for the similarity matrices: loaded (memory-mapped) when it
+        # exists, written after computing them otherwise. Callers key it by
+        # hash_ratings and the options above
+        self.similarity_path = similarity_path
+        # Accept an already-fitted NLP recommender so callers can reuse it
+        self.nlp_recommender = nlp_recommender or NLPRecommender()
         self.MIN_RATINGS_REQUIRED = 3
         self.MIN_RATING_THRESHOLD = 4
+        self.ITEM_NEIGHBORS = 50  # Similar items kept per movie
         self._prepare_data()
 
     def _prepare_data(self):
@@ -28,81 +200,171 @@ class MovieRecommender:
 
             logger.info(f"Preparing data with {len(self.ratings_df)} ratings")
             
-            # Create user-movie matrix
-            self.user_movie_matrix = self.ratings_df.pivot(
-                index='user_id',
-                columns='movie_id',
-                values='rating'
-            ).fillna(0)
+            # Create sparse user-movie matrix (rows: users, columns: movies)
+            user_codes, self.user_index = pd.factorize(self.ratings_df['user_id'], sort=True)
+            movie_codes, self.movie_index = pd.factorize(self.ratings_df['movie_id'], sort=True)
+            self.user_pos = {user_id: idx for idx, user_id in enumerate(self.user_index)}
+            self.movie_pos = {movie_id: idx for idx, movie_id in enumerate(self.movie_index)}
+            self.user_movie_matrix = sp.coo_matrix(
+                (self.ratings_df['rating'].to_numpy(dtype=np.float32), (user_codes, movie_codes)),
+                shape=(len(self.user_index), len(self.movie_index))
+            ).tocsr()
 
-            if self.user_movie_matrix.empty:
+            if self.user_movie_matrix.nnz == 0:
                 logger.warning("Empty user-movie matrix")
                 return
 
-            # Normalize ratings using Z-score normalization
-            self.normalized_matrix = (self.user_movie_matrix - self.user_movie_matrix.mean()) / self.user_movie_matrix.std()
-            self.normalized_matrix = self.normalized_matrix.fillna(0)
+            # Per-user lookups so recommendation calls never mask the full ratings frame:
+            # user_rated maps user_id to the set of rated movie IDs, user_ratings_arr
+            # to a (movie_ids, ratings) pair of arrays
+            movie_ids = self.ratings_df['movie_id'].to_numpy()
+            ratings = self.ratings_df['rating'].to_numpy(dtype=np.float32)
+            self.user_ratings_arr = {
+                user_id: (movie_ids[rows], ratings[rows])
+                for user_id, rows in self.ratings_df.groupby('user_id').indices.items()
+            }
+            self.user_rated = {
+                user_id: set(user_movie_ids.tolist())
+                for user_id, (user_movie_ids, _) in self.user_ratings_arr.items()
+            }
+
+            # Center each user's ratings on their own mean, over rated movies only
+            # (unrated entries stay implicit zeros, so the matrix stays sparse)
+            user_counts = np.diff(self.user_movie_matrix.indptr)
+            self.user_means = self.user_movie_matrix.sum(axis=1).A1 / np.maximum(user_counts, 1)
+            centered_matrix = self.user_movie_matrix.copy()
+            centered_matrix.data -= np.repeat(self.user_means, user_counts).astype(centered_matrix.dtype)
+            centered_matrix.eliminate_zeros()
+            
+            # L2-normalize user rows and movie columns once, staying sparse
+            # throughout; every cosine below is a plain product of these
+            self.normalized_matrix = normalize(centered_matrix, norm='l2', axis=1)
+            self.normalized_items = normalize(centered_matrix, norm='l2', axis=0).T.tocsr()
             
             logger.info(f"Created matrix with shape: {self.normalized_matrix.shape}")
             
-            # Calculate user similarity matrix
-            self.user_similarity_matrix = cosine_similarity(self.normalized_matrix)
+            if self.use_lsh:
+                # Similar users are looked up per query (building the index is
+                # cheap, so it isn't persisted)
+                self.user_lsh_index = _SimHashIndex(self.normalized_matrix)
+            elif self.normalized_matrix.shape[0] > MAX_PRECOMPUTED_USERS:
+                # Fitting brute-force kNN only stores the vectors; each query
+                # scans them in chunks, so memory stays O(users) (not persisted)
+                self.user_neighbors = NearestNeighbors(
+                    metric='cosine', algorithm='brute', n_jobs=-1
+                ).fit(self.normalized_matrix)
+            
+            if self._load_similarities():
+                return
+            
+            # Calculate user similarity matrix (sparse CSR), unless users are
+            # looked up through user_lsh_index or user_neighbors instead
+            if self.user_lsh_index is None and self.user_neighbors is None:
+                self.user_similarity_matrix = _cosine_similarity(self.normalized_matrix)
             
-            # Calculate item similarity matrix
-            self.item_similarity_matrix = cosine_similarity(self.normalized_matrix.T)
+            # Calculate item similarity matrix, keeping only each movie's top-K
+            # neighbours (excluding itself); computed exactly in cache-sized row
+            # blocks, which beats rescoring LSH candidates row by row
+            self.item_similarity_matrix = _top_k_similarity_blocked(self.normalized_items, self.ITEM_NEIGHBORS)
             
             logger.info("Similarity matrices calculated successfully")
+            self._save_similarities()
             
         except Exception as e:
             logger.error(f"Error in data preparation: {str(e)}")
             self.user_movie_matrix = None
+            self.user_pos = {}
+            self.movie_pos = {}
+            self.user_rated = {}
+            self.user_ratings_arr = {}
             self.user_similarity_matrix = None
             self.item_similarity_matrix = None
+            self.user_lsh_index = None
+            self.user_neighbors = None
+
+    def _load_similarities(self):
+        """Load similarity matrices saved at similarity_path; returns True on success"""
+        if self.similarity_path is None or not self.similarity_path.exists():
+            return False
+        try:
+            # mmap_mode maps the matrices' arrays instead of reading them into memory
+            self.user_similarity_matrix, self.item_similarity_matrix = joblib.load(
+                self.similarity_path, mmap_mode='r'
+            )
+            logger.info(f"Loaded similarity matrices from {self.similarity_path}")
+            return True
+        except Exception as e:
+            logger.error(f"Error loading similarity matrices: {str(e)}")
+            return False
+
+    def _save_similarities(self):
+        """Persist the similarity matrices to similarity_path, if set"""
+        if self.similarity_path is None:
+            return
+        try:
+            self.similarity_path.parent.mkdir(parents=True, exist_ok=True)
+            joblib.dump((self.user_similarity_matrix, self.item_similarity_matrix), self.similarity_path)
+            logger.info(f"Saved similarity matrices to {self.similarity_path}")
+        except Exception as e:
+            logger.error(f"Error saving similarity matrices: {str(e)}")
+
+    def _similar_users(self, user_idx, k):
+        """Indices and similarities of the k users most similar to user_idx"""
+        if self.use_lsh:
+            candidates = self.user_lsh_index.candidates(user_idx)
+            similarities = self.user_lsh_index.similarities(user_idx, candidates)
+            top = _top_k(similarities, k)
+            return candidates[top], similarities[top]
+        
+        if self.user_neighbors is not None:
+            n_neighbors = min(k + 1, self.normalized_matrix.shape[0])
+            distances, indices = self.user_neighbors.kneighbors(
+                self.normalized_matrix[user_idx], n_neighbors=n_neighbors
+            )
+            not_self = indices[0] != user_idx  # Exclude the user themselves
+            return indices[0][not_self][:k], (1 - distances[0][not_self])[:k]
+        
+        user_similarities = self.user_similarity_matrix[user_idx].toarray().ravel()
+        user_similarities[user_idx] = -np.inf  # Exclude the user themselves
+        similar_users = _top_k(user_similarities, k)
+        similar_users = similar_users[np.isfinite(user_similarities[similar_users])]
+        return similar_users, user_similarities[similar_users]
 
     def _get_user_based_recommendations(self, user_id, n_recommendations=5):
         try:
-            user_idx = self.user_movie_matrix.index.get_loc(user_id)
-            user_similarities = self.user_similarity_matrix[user_idx]
-            similar_users = np.argsort(user_similarities)[::-1][1:6]  # Get top 5 similar users
-            
-            recommendations = {}
-            rated_movies = self.ratings_df[self.ratings_df['user_id'] == user_id]['movie_id'].tolist()
-            
-            for similar_user_idx in similar_users:
-                similar_user_id = self.user_movie_matrix.index[similar_user_idx]
-                similar_user_ratings = self.ratings_df[self.ratings_df['user_id'] == similar_user_id]
-                
-                for _, rating in similar_user_ratings.iterrows():
-                    if rating['movie_id'] not in rated_movies:
-                        if rating['movie_id'] not in recommendations:
-                            recommendations[rating['movie_id']] = rating['rating'] * user_similarities[similar_user_idx]
-                        else:
-                            recommendations[rating['movie_id']] += rating['rating'] * user_similarities[similar_user_idx]
-            
-            return sorted(recommendations.items(), key=lambda x: x[1], reverse=True)[:n_recommendations]
+            user_idx = self.user_pos[user_id]
+            similar_users, similarities = self._similar_users(user_idx, 5)  # Get top 5 similar users
+            if not similar_users.size:
+                return []
+            
+            # Similarity-weighted sum of the similar users' ratings in one sparse product
+            similar_ratings = self.user_movie_matrix[similar_users]
+            scores = similar_ratings.T @ similarities
+            
+            # Candidates: movies rated by a similar user but not by this user
+            candidate_mask = np.zeros(len(scores), dtype=bool)
+            candidate_mask[similar_ratings.indices] = True
+            candidate_mask[self.user_movie_matrix[user_idx].indices] = False
+            candidates = np.flatnonzero(candidate_mask)
+            
+            top = candidates[_top_k(scores[candidates], n_recommendations)]
+            return list(zip(self.movie_index[top].tolist(), scores[top].tolist()))
         except Exception as e:
             logger.error(f"Error in user-based recommendations: {str(e)}")
             return []
 
     def _get_item_based_recommendations(self, user_id, n_recommendations=5):
         try:
-            user_ratings = self.ratings_df[self.ratings_df['user_id'] == user_id]
-            recommendations = {}
-            
-            for _, rating in user_ratings.iterrows():
-                movie_idx = self.user_movie_matrix.columns.get_loc(rating['movie_id'])
-                similar_items = np.argsort(self.item_similarity_matrix[movie_idx])[::-1][1:6]
-                
-                for similar_item_idx in similar_items:
-                    similar_movie_id = self.user_movie_matrix.columns[similar_item_idx]
-                    if similar_movie_id not in user_ratings['movie_id'].values:
-                        similarity_score = self.item_similarity_matrix[movie_idx][similar_item_idx]
-                        if similar_movie_id not in recommendations:
-                            recommendations[similar_movie_id] = rating['rating'] * similarity_score
-                        else:
-                            recommendations[similar_movie_id] += rating['rating'] * similarity_score
-            
-            return sorted(recommendations.items(), key=lambda x: x[1], reverse=True)[:n_recommendations]
+            # Item-based score s = r_u . S_item: one sparse row-vector x matrix product
+            user_ratings = self.user_movie_matrix[self.user_pos[user_id]]
+            scores = (user_ratings @ self.item_similarity_matrix).tocsr()
+            
+            # Candidates: movies with a score that the user hasn't rated yet
+            unrated = ~np.isin(scores.indices, user_ratings.indices)
+            candidates, candidate_scores = scores.indices[unrated], scores.data[unrated]
+            
+            top = _top_k(candidate_scores, n_recommendations)
+            return list(zip(self.movie_index[candidates[top]].tolist(), candidate_scores[top].tolist()))
         except Exception as e:
             logger.error(f"Error in item-based recommendations: {str(e)}")
             return []
@@ -111,21 +373,30 @@ class MovieRecommender:
         """Update the NLP recommender with new movie data"""
         self.nlp_recommender.fit(movie_data)
 
-    def _get_content_based_recommendations(self, user_ratings, n_recommendations=5):
+    def _get_content_based_recommendations(self, user_id, n_recommendations=5):
         """Get recommendations based on movie content similarity"""
         try:
-            content_recommendations = {}
-            
-            # Get recommendations based on each highly-rated movie
-            for _, row in user_ratings[user_ratings['rating'] >= self.MIN_RATING_THRESHOLD].iterrows():
-                similar_movies = self.nlp_recommender.get_similar_movies(row['movie_id'])
-                for movie_id in similar_movies:
-                    if movie_id not in content_recommendations:
-                        content_recommendations[movie_id] = row['rating']
-                    else:
-                        content_recommendations[movie_id] = max(content_recommendations[movie_id], row['rating'])
-            
-            return sorted(content_recommendations.items(), key=lambda x: x[1], reverse=True)[:n_recommendations]
+            movie_ids, ratings = self.user_ratings_arr[user_id]
+            liked = ratings >= self.MIN_RATING_THRESHOLD
+            
+            # Similar movies of every highly-rated movie, flattened alongside the
+            # rating of the liked movie each one came from
+            similar_movies = [
+                self.nlp_recommender.get_similar_movies(liked_movie_id)
+                for liked_movie_id in movie_ids[liked].tolist()
+            ]
+            counts = [len(similar) for similar in similar_movies]
+            candidate_ids = np.fromiter(chain.from_iterable(similar_movies), dtype=np.int64, count=sum(counts))
+            candidate_ratings = np.repeat(ratings[liked], counts)
+            
+            # Skip rated movies; score each candidate by its best source rating
+            unrated = ~np.isin(candidate_ids, movie_ids)
+            codes, candidates = pd.factorize(candidate_ids[unrated])
+            scores = np.full(len(candidates), -np.inf)
+            np.maximum.at(scores, codes, candidate_ratings[unrated])
+            
+            top = _top_k(scores, n_recommendations)
+            return list(zip(candidates[top].tolist(), scores[top].tolist()))
         except Exception as e:
             logger.error(f"Error in content-based recommendations: {str(e)}")
             return []
@@ -133,16 +404,15 @@ class MovieRecommender:
     def get_recommendations(self, user_id: str, n_recommendations: int = 5, movie_data=None):
         """Get hybrid movie recommendations combining collaborative and content-based approaches"""
         try:
-            if self.user_movie_matrix is None or self.user_similarity_matrix is None:
+            if self.user_movie_matrix is None or self.item_similarity_matrix is None:
                 logger.warning("Recommendation system not properly initialized")
                 return [], "System not properly initialized. Please try again later."
 
-            if user_id not in self.user_movie_matrix.index:
+            if user_id not in self.user_pos:
                 logger.warning(f"User {user_id} not found in the matrix")
                 return [], "No ratings found for this user."
 
-            user_ratings = self.ratings_df[self.ratings_df['user_id'] == user_id]
-            user_ratings_count = len(user_ratings)
+            user_ratings_count = len(self.user_rated[user_id])
             
             if user_ratings_count < self.MIN_RATINGS_REQUIRED:
                 logger.info(f"User {user_id} has insufficient ratings: {user_ratings_count}")
@@ -155,33 +425,31 @@ class MovieRecommender:
             # Get recommendations from all approaches
             user_based_recs = self._get_user_based_recommendations(user_id, n_recommendations)
             item_based_recs = self._get_item_based_recommendations(user_id, n_recommendations)
-            content_based_recs = self._get_content_based_recommendations(user_ratings, n_recommendations)
+            content_based_recs = self._get_content_based_recommendations(user_id, n_recommendations)
 
             # Combine recommendations with weights
             USER_WEIGHT = 0.4
             ITEM_WEIGHT = 0.3
             CONTENT_WEIGHT = 0.3
 
-            combined_recs = {}
+            # Weighted sum per movie: factorize the candidate IDs (in order of first
+            # appearance) and scatter-add every weighted score in one pass
+            weighted_recs = [
+                (movie_id, score * weight)
+                for recs, weight in (
+                    (user_based_recs, USER_WEIGHT),
+                    (item_based_recs, ITEM_WEIGHT),
+                    (content_based_recs, CONTENT_WEIGHT),
+                )
+                for movie_id, score in recs
+            ]
+            movie_ids, weighted_scores = zip(*weighted_recs) if weighted_recs else ((), ())
+            codes, candidates = pd.factorize(np.asarray(movie_ids))
+            combined_scores = np.zeros(len(candidates))
+            np.add.at(combined_scores, codes, weighted_scores)
             
-            for movie_id, score in user_based_recs:
-                combined_recs[movie_id] = score * USER_WEIGHT
-
-            for movie_id, score in item_based_recs:
-                if movie_id in combined_recs:
-                    combined_recs[movie_id] += score * ITEM_WEIGHT
-                else:
-                    combined_recs[movie_id] = score * ITEM_WEIGHT
-
-            for movie_id, score in content_based_recs:
-                if movie_id in combined_recs:
-                    combined_recs[movie_id] += score * CONTENT_WEIGHT
-                else:
-                    combined_recs[movie_id] = score * CONTENT_WEIGHT
-
-            # Sort and get final recommendations
-            final_recommendations = sorted(combined_recs.items(), key=lambda x: x[1], reverse=True)
-            recommendations = [movie_id for movie_id, _ in final_recommendations[:n_recommendations]]
+            # Select final recommendations
+            recommendations = candidates[_top_k(combined_scores, n_recommendations)].tolist()
 
             if not recommendations:
                 return [], "No recommendations found based on your ratings."
@@ -1,48 +1,127 @@
-import os
-from dotenv import load_dotenv
-import requests
+import asyncio
+import threading
+import time
+from collections import deque
+import httpx
 import logging
+from .config import Config
 
 logger = logging.getLogger(__name__)
+# httpx logs every request URL at INFO, which would leak the api_key query parameter
+logging.getLogger("httpx").setLevel(logging.WARNING)
 
 class TMDBApi:
     def __init__(self):
-        """Initialize TMDB API with API key from environment variables."""
-        load_dotenv()
-        self.api_key = os.getenv('TMDB_API_KEY')
+        """Initialize TMDB API with the API key from the configuration."""
+        self.api_key = Config.TMDB_API_KEY
         if not self.api_key:
             raise ValueError("TMDB_API_KEY not found in environment variables")
-        
-        self.base_url = "https://api.themoviedb.org/3"
+
+        self.base_url = Config.TMDB_BASE_URL
+
+        # Single long-lived client: keep-alive and HTTP/2 multiplexing let
+        # concurrent requests share one connection instead of a TLS handshake each
+        self.client = httpx.Client(
+            transport=httpx.HTTPTransport(**self._transport_options()),
+            **self._client_options()
+        )
+
+        # Sliding window of request timestamps shared by all worker threads
+        self._request_times = deque()
+        self._rate_lock = threading.Lock()
+
+    def _transport_options(self):
+        """Connection pool options shared by the sync and async transports.
+
+        The pool keeps one keep-alive connection per worker thread, and
+        connection failures (not HTTP errors) are retried on a fresh connection.
+        """
+        return {
+            "http2": True,
+            "limits": httpx.Limits(
+                max_connections=Config.TMDB_MAX_WORKERS,
+                max_keepalive_connections=Config.TMDB_MAX_WORKERS,
+            ),
+            "retries": Config.TMDB_CONNECT_RETRIES,
+        }
+
+    def _client_options(self):
+        """Options shared by the sync and async HTTP clients."""
+        return {
+            "base_url": self.base_url,
+            "params": {"api_key": self.api_key, "language": "en-US"},
+            "timeout": 10.0,
+        }
+
+    def async_client(self):
+        """Create an async client for concurrent requests; use as an async context manager."""
+        return httpx.AsyncClient(
+            transport=httpx.AsyncHTTPTransport(**self._transport_options()),
+            **self._client_options()
+        )
+
+    def close(self):
+        """Close the underlying HTTP connection pool."""
+        self.client.close()
+
+    def _reserve_request_slot(self):
+        """Reserve a slot in the rate-limit window.
+
+        Returns:
+            0 if the request may be sent now, otherwise the seconds to wait
+            before trying again
+        """
+        with self._rate_lock:
+            now = time.monotonic()
+            while self._request_times and now - self._request_times[0] >= Config.TMDB_RATE_PERIOD:
+                self._request_times.popleft()
+            if len(self._request_times) < Config.TMDB_RATE_LIMIT:
+                self._request_times.append(now)
+                return 0
+            return Config.TMDB_RATE_PERIOD - (now - self._request_times[0])
+
+    def _throttle(self):
+        """Block until a request can be sent without exceeding the TMDB rate limit."""
+        while (wait := self._reserve_request_slot()) > 0:
+            time.sleep(wait)
+
+    async def _athrottle(self):
+        """Async variant of _throttle that yields to the event loop while waiting."""
+        while (wait := self._reserve_request_slot()) > 0:
+            await asyncio.sleep(wait)
 
     def get_popular_movies(self, genre_ids=None, year_range=None, page=1):
-        """Get popular movies with optional genre and year filtering."""
+        """Get popular movies with optional genre and year filtering.
+
+        Uses the discover endpoint so TMDB applies the filters server-side
+        (/movie/popular ignores them).
+        """
         try:
-            url = f"{self.base_url}/movie/popular"
             params = {
-                "api_key": self.api_key,
-                "language": "en-US",
+                "sort_by": "popularity.desc",
                 "page": page
             }
-            
-            # Add genre filtering if specified
+
+            # Add genre filtering if specified (pipe-separated = any of the genres;
+            # commas would require all of them)
             if genre_ids:
-                params["with_genres"] = ",".join(str(id) for id in genre_ids)
-            
+                params["with_genres"] = "|".join(str(id) for id in genre_ids)
+
             # Add year range filtering if specified
             if year_range:
                 start_year, end_year = year_range
                 params["primary_release_date.gte"] = f"{start_year}-01-01"
                 params["primary_release_date.lte"] = f"{end_year}-12-31"
-            
-            response = requests.get(url, params=params)
+
+            self._throttle()
+            response = self.client.get("/discover/movie", params=params)
             response.raise_for_status()
-            
+
             data = response.json()
             logger.info(f"Successfully fetched {len(data.get('results', []))} popular movies from page {page}")
             return data
-            
-        except requests.exceptions.RequestException as e:
+
+        except httpx.HTTPError as e:
             logger.error(f"Error fetching popular movies: {e}")
             return {"results": []}
 
@@ -50,9 +129,7 @@ class TMDBApi:
         """Search for movies by query string with optional year range."""
         try:
             params = {
-                "api_key": self.api_key,
                 "query": query,
-                "language": "en-US",
                 "page": 1
             }
             if year_range:
@@ -63,44 +140,59 @@ class TMDBApi:
                     params["primary_release_date.gte"] = f"{start_year}-01-01"
                     params["primary_release_date.lte"] = f"{end_year}-12-31"
 
-            response = requests.get(
-                f"{self.base_url}/search/movie",
-                params=params
-            )
+            self._throttle()
+            response = self.client.get("/search/movie", params=params)
             response.raise_for_status()
             return response.json()
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Error searching movies: {e}")
             return {"results": []}
 
     def get_movie_details(self, movie_id: int):
         """Get detailed information about a specific movie."""
         try:
-            response = requests.get(
-                f"{self.base_url}/movie/{movie_id}",
-                params={
-                    "api_key": self.api_key,
-                    "language": "en-US"
-                }
-            )
+            self._throttle()
+            response = self.client.get(f"/movie/{movie_id}")
             response.raise_for_status()
             return response.json()
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Error fetching movie details: {e}")
             return {}
 
+    async def aget_movie_details(self, client: httpx.AsyncClient, movie_id: int):
+        """Async variant of get_movie_details using a client from async_client()."""
+        try:
+            await self._athrottle()
+            response = await client.get(f"/movie/{movie_id}")
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPError as e:
+            logger.error(f"Error fetching movie details: {e}")
+            return {}
+
+    async def get_movie_details_async(self, movie_ids):
+        """Fetch details for several movies concurrently over one async client.
+
+        Returns the details in the order of movie_ids ({} for failed requests).
+        """
+        async with self.async_client() as client:
+            return await asyncio.gather(
+                *(self.aget_movie_details(client, movie_id) for movie_id in movie_ids)
+            )
+
+    def get_movie_details_bulk(self, movie_ids):
+        """Synchronous wrapper around get_movie_details_async."""
+        if not movie_ids:
+            return []
+        return asyncio.run(self.get_movie_details_async(movie_ids))
+
     def get_genres(self):
         """Get list of movie genres."""
         try:
-            response = requests.get(
-                f"{self.base_url}/genre/movie/list",
-                params={
-                    "api_key": self.api_key,
-                    "language": "en-US"
-                }
-            )
+            self._throttle()
+            response = self.client.get("/genre/movie/list")
             response.raise_for_status()
             return response.json()
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Error fetching genres: {e}")
             return {"genres": []}
@@ -1,61 +1,11 @@
 import streamlit as st
 from datetime import datetime
 import html
+import string
+import numpy as np
 
-def generate_user_id():
-    """Generate a unique user ID based on timestamp and session state"""
-    if 'user_id' not in st.session_state:
-        st.session_state.user_id = f"user_{datetime.now().strftime('%Y%m%d%H%M%S')}"
-    return st.session_state.user_id
-
-def format_movie_card(movie):
-    """Format movie information for display"""
-    # Get movie details and escape them
-    title = html.escape(movie.get('title', 'Unknown Title'))
-    release_date = movie.get('release_date', '').split('-')[0]
-    overview = html.escape(movie.get('overview', 'No overview available.')[:200] + '...')
-    rating = movie.get('vote_average')
-    rating_text = f"{round(float(rating), 1)}/10" if rating is not None else "N/A"
-
-    # Start building the card HTML with minimal nesting
-    card_html = '<div class="movie-card">'
-
-    # Add poster
-    if movie.get('poster_path'):
-        poster_url = f"https://image.tmdb.org/t/p/w500{movie['poster_path']}"
-        card_html += f'<img src="{poster_url}" class="movie-poster">'
-
-    # Add content container
-    card_html += '<div class="movie-content">'
-
-    # Add title and year
-    card_html += f'<h3 class="movie-title">{title} {f"({release_date})" if release_date else ""}</h3>'
-
-    # Add genres
-    genre_names = []
-    if 'genres' in movie:
-        genre_names = [html.escape(g['name']) for g in movie['genres']]
-    elif 'genre_ids' in movie and 'genres_dict' in st.session_state:
-        genres_dict = st.session_state['genres_dict']
-        genre_names = [html.escape(genres_dict[g_id]) for g_id in movie['genre_ids'] if g_id in genres_dict]
-
-    if genre_names:
-        card_html += '<div class="genre-container">'
-        for genre in genre_names:
-            card_html += f'<span class="genre-pill">{genre}</span>'
-        card_html += '</div>'
-
-    # Add rating
-    card_html += f'<div class="movie-rating"><strong>Rating:</strong> {rating_text}</div>'
-
-    # Add overview
-    card_html += f'<div class="movie-overview">{overview}</div>'
-
-    # Close containers
-    card_html += '</div></div>'
-
-    # Add CSS styles
-    styles = """
+# Card styles, emitted once per page by emit_movie_card_styles rather than with every card
+_STYLES = """
     <style>
     .movie-card {
         background-color: #262730;
@@ -103,6 +53,73 @@ def format_movie_card(movie):
         color: #e0e0e0;
     }
     </style>
+"""
+
+_CARD_TEMPLATE = string.Template(
+    '<div class="movie-card">$poster'
+    '<div class="movie-content">'
+    '<h3 class="movie-title">$heading</h3>'
+    '$genres'
+    '<div class="movie-rating"><strong>Rating:</strong> $rating</div>'
+    '<div class="movie-overview">$overview</div>'
+    '</div></div>'
+)
+
+def generate_user_id():
+    """Generate a unique user ID based on timestamp and session state"""
+    if 'user_id' not in st.session_state:
+        st.session_state.user_id = f"user_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    return st.session_state.user_id
+
+def lookup_genre_names(genre_ids):
+    """Translate TMDB genre IDs to names with the session's genres_arr lookup array
+    
+    Unknown IDs are skipped.
     """
+    genres_arr = st.session_state.get('genres_arr')
+    if genres_arr is None or not genre_ids:
+        return []
+    ids = np.asarray(genre_ids, dtype=np.intp)
+    names = genres_arr[ids[(ids >= 0) & (ids < len(genres_arr))]]
+    return names[names.astype(bool)].tolist()  # Empty slots hold None
+
+def emit_movie_card_styles():
+    """Add the movie card CSS to the page; call once per script run before any cards"""
+    st.markdown(_STYLES, unsafe_allow_html=True)
+
+def format_movie_card(movie):
+    """Format movie information for display
+    
+    Returns only the card markup; the page needs emit_movie_card_styles() once.
+    """
+    # Get movie details and escape them
+    title = html.escape(movie.get('title', 'Unknown Title'))
+    release_date = movie.get('release_date', '').split('-')[0]
+    overview = html.escape(movie.get('overview', 'No overview available.')[:200] + '...')
+    rating = movie.get('vote_average')
+    rating_text = f"{round(float(rating), 1)}/10" if rating is not None else "N/A"
+
+    poster = ''
+    if movie.get('poster_path'):
+        poster_url = f"https://image.tmdb.org/t/p/w500{movie['poster_path']}"
+        poster = f'<img src="{poster_url}" class="movie-poster">'
+
+    genre_names = []
+    if 'genres' in movie:
+        genre_names = [html.escape(g['name']) for g in movie['genres']]
+    elif 'genre_ids' in movie:
+        genre_names = [html.escape(name) for name in lookup_genre_names(movie['genre_ids'])]
+
+    genres = ''
+    if genre_names:
+        genres = '<div class="genre-container">' + ''.join(
+            f'<span class="genre-pill">{genre}</span>' for genre in genre_names
+        ) + '</div>'
 
-    return styles + card_html
+    return _CARD_TEMPLATE.substitute(
+        poster=poster,
+        heading=f'{title} {f"({release_date})" if release_date else ""}',
+        genres=genres,
+        rating=rating_text,
+        overview=overview,
+    )